@@ -1,7 +1,10 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Response, stream_template, stream_with_context
 import sqlite3
 from datetime import datetime
 import os
+from night_audit import NightAuditScheduler, init_audit_tables, latest_summary, total_revenue
+from room_search import ROOM_SORTS, create_room_indexes, build_room_search, facet_counts
 
 app = Flask(__name__)
 
@@ -20,6 +23,9 @@ def init_db():
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # WAL is stored in the database file, so it only needs setting once here
+    cursor.execute("PRAGMA journal_mode=WAL")
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS rooms (
             room_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -78,7 +84,14 @@ def init_db():
         )
     ''')
 
+    # Composite indexes backing the /rooms search filters and facet counts
+    create_room_indexes(cursor)
+
+    # Revenue since the last night audit is summed by payment_date
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_payments_date ON payments (payment_date)")
+
     conn.commit()
+    init_audit_tables(conn)
     conn.close()
 
 
@@ -132,7 +145,7 @@ def dashboard():
     occupied_rooms = conn.execute("SELECT COUNT(*) FROM rooms WHERE status='Occupied'").fetchone()[0]
     total_guests = conn.execute("SELECT COUNT(*) FROM guests").fetchone()[0]
     total_bookings = conn.execute("SELECT COUNT(*) FROM bookings").fetchone()[0]
-    revenue = conn.execute("SELECT SUM(amount) FROM payments").fetchone()[0] or 0
+    revenue = total_revenue(conn)
     conn.close()
 
     return render_template("dashboard.html",
@@ -149,10 +162,25 @@ def dashboard():
 @app.route("/rooms")
 @login_required
 def rooms():
+    filters = {
+        "room_type": request.args.get("room_type", ""),
+        "status": request.args.get("status", ""),
+        "capacity": request.args.get("capacity", type=int),
+        "min_price": request.args.get("min_price", type=float),
+        "max_price": request.args.get("max_price", type=float),
+        "sort": request.args.get("sort", "id"),
+    }
+    if filters["sort"] not in ROOM_SORTS:
+        filters["sort"] = "id"
+
+    rooms_sql, params, facet_sql, facet_params = build_room_search(filters)
     conn = get_db_connection()
-    rooms = conn.execute("SELECT * FROM rooms").fetchall()
+    rooms = conn.execute(rooms_sql, params).fetchall()
+    type_counts, status_counts = facet_counts(conn.execute(facet_sql, facet_params), filters)
     conn.close()
-    return render_template("rooms.html", rooms=rooms)
+
+    return render_template("rooms.html", rooms=rooms, filters=filters,
+                           type_counts=type_counts, status_counts=status_counts)
 
 
 @app.route("/rooms/add", methods=["GET", "POST"])
@@ -180,15 +208,52 @@ def delete_room(room_id):
     return redirect(url_for("rooms"))
 
 
+# --------------------- LIST PAGES ---------------------
+
+# Streaming is opt-in per request (?stream=1) or app-wide (STREAM_LIST_PAGES=1).
+# Rows are then read lazily from the cursor while the template renders, and the
+# HTML goes out in chunks of STREAM_CHUNK_SIZE encoded bytes instead of being
+# built in memory first.
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def render_rows(template, name, query, params=(), **context):
+    conn = get_db_connection()
+    streaming = request.args.get("stream", os.getenv("STREAM_LIST_PAGES", "0")) == "1"
+
+    if not streaming:
+        context[name] = conn.execute(query, params).fetchall()
+        conn.close()
+        return render_template(template, **context)
+
+    def chunks():
+        # Owns the connection: closed however rendering ends, including template errors
+        try:
+            context[name] = conn.execute(query, params)
+            buffer, size = [], 0
+            for piece in stream_template(template, **context):
+                data = piece.encode("utf-8")
+                buffer.append(data)
+                size += len(data)
+                if size >= STREAM_CHUNK_SIZE:
+                    yield b"".join(buffer)
+                    buffer, size = [], 0
+            if buffer:
+                yield b"".join(buffer)
+        finally:
+            conn.close()
+
+    response = Response(stream_with_context(chunks()), mimetype="text/html")
+    # An unstarted generator never reaches its finally, e.g. when the client goes away first
+    response.call_on_close(conn.close)
+    return response
+
+
 # --------------------- GUESTS ---------------------
 
 @app.route("/guests")
 @login_required
 def guests():
-    conn = get_db_connection()
-    guests = conn.execute("SELECT * FROM guests").fetchall()
-    conn.close()
-    return render_template("guests.html", guests=guests)
+    return render_rows("guests.html", "guests", "SELECT * FROM guests")
 
 
 @app.route("/guests/add", methods=["GET", "POST"])
@@ -210,11 +275,8 @@ def add_guest():
 @login_required
 def search_guest():
     query = request.args.get("q", "")
-    conn = get_db_connection()
-    guests = conn.execute("SELECT * FROM guests WHERE name LIKE ? OR phone LIKE ?",
-                          (f"%{query}%", f"%{query}%")).fetchall()
-    conn.close()
-    return render_template("guests.html", guests=guests, search_query=query)
+    return render_rows("guests.html", "guests", "SELECT * FROM guests WHERE name LIKE ? OR phone LIKE ?",
+                       (f"%{query}%", f"%{query}%"), search_query=query)
 
 
 # --------------------- BOOKINGS ---------------------
@@ -222,17 +284,14 @@ def search_guest():
 @app.route("/bookings")
 @login_required
 def bookings():
-    conn = get_db_connection()
-    bookings = conn.execute('''
+    return render_rows("bookings.html", "bookings", '''
         SELECT b.booking_id, g.name, r.room_number, b.check_in_date, 
                b.check_out_date, b.total_amount, b.booking_status
         FROM bookings b
         JOIN guests g ON b.guest_id = g.guest_id
         JOIN rooms r ON b.room_id = r.room_id
         ORDER BY b.booking_id DESC
-    ''').fetchall()
-    conn.close()
-    return render_template("bookings.html", bookings=bookings)
+    ''')
 
 
 @app.route("/bookings/add", methods=["GET", "POST"])
@@ -297,10 +356,7 @@ def checkout(booking_id):
 @app.route("/staff")
 @login_required
 def staff():
-    conn = get_db_connection()
-    staff = conn.execute("SELECT * FROM staff").fetchall()
-    conn.close()
-    return render_template("staff.html", staff=staff)
+    return render_rows("staff.html", "staff", "SELECT * FROM staff")
 
 
 @app.route("/staff/add", methods=["GET", "POST"])
@@ -324,7 +380,8 @@ def add_staff():
 @login_required
 def reports():
     conn = get_db_connection()
-    revenue = conn.execute("SELECT SUM(amount) FROM payments").fetchone()[0] or 0
+    summary = latest_summary(conn)
+    revenue = total_revenue(conn, summary)
     monthly = conn.execute('''
         SELECT strftime('%Y-%m', payment_date) AS month, SUM(amount) AS revenue
         FROM payments GROUP BY month ORDER BY month DESC LIMIT 6
@@ -339,12 +396,27 @@ def reports():
                            monthly=monthly,
                            occupied_rooms=occupied,
                            available_rooms=total_rooms - occupied,
-                           occupancy_rate=rate)
+                           occupancy_rate=rate,
+                           summary=summary)
+
+
+# --------------------- STARTUP ---------------------
+
+# Create tables and indexes on import so gunicorn workers get them too;
+# the room search names its indexes (INDEXED BY) and fails without them.
+init_db()
+
+
+# --------------------- NIGHT AUDIT ---------------------
+
+# Run the night audit inside the web process when no separate worker is deployed.
+# Job locks keep multiple gunicorn workers from running the same job twice.
+if os.getenv("NIGHT_AUDIT_IN_PROCESS") == "1":
+    NightAuditScheduler().start()
 
 
 # --------------------- RUN APP ---------------------
 
 if __name__ == "__main__":
-    init_db()
     port = int(os.getenv("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -1,11 +1,29 @@
 import sqlite3
 from datetime import datetime
 import os
+import re
+import sys
+import json
+import argparse
 import hashlib
 
+
+class BatchError(ValueError):
+    """A batch operation was rejected (bad input or invalid state)"""
+
+
+def field(op, name):
+    """Required scalar field of a batch operation; null, true/false, lists and objects count as missing"""
+    value = op.get(name)
+    if value is None or isinstance(value, (bool, list, dict)):
+        raise BatchError(f"Missing field: {name}")
+    return value
+
+
 class HotelManagementSystem:
-    def __init__(self, db_name="hotel_management.db"):
+    def __init__(self, db_name="hotel_management.db", verbose=True):
         self.db_name = db_name
+        self.verbose = verbose
         self.conn = None
         self.cursor = None
         self.connect_db()
@@ -15,7 +33,8 @@ class HotelManagementSystem:
         """Connect to SQLite database"""
         self.conn = sqlite3.connect(self.db_name)
         self.cursor = self.conn.cursor()
-        print(f"✓ Connected to database: {self.db_name}")
+        if self.verbose:
+            print(f"✓ Connected to database: {self.db_name}")
     
     def create_tables(self):
         """Create all necessary tables"""
@@ -101,7 +120,8 @@ class HotelManagementSystem:
                                 (default_user, default_pass))
 
         self.conn.commit()
-        print("✓ All tables created successfully")
+        if self.verbose:
+            print("✓ All tables created successfully")
 
     # ---------------- ADMIN LOGIN ----------------
     def admin_login(self):
@@ -109,20 +129,21 @@ class HotelManagementSystem:
         username = input("Username: ")
         password = input("Password: ")
 
+        if self.check_admin(username, password):
+            print("✓ Login Successful! Welcome Admin.")
+            return True
+        else:
+            print("✗ Incorrect Username or Password!")
+            return False
+
+    def check_admin(self, username, password):
         password_hash = hashlib.sha256(password.encode()).hexdigest()
 
         self.cursor.execute(
             "SELECT * FROM admin WHERE username = ? AND password_hash = ?",
             (username, password_hash)
         )
-        result = self.cursor.fetchone()
-
-        if result:
-            print("✓ Login Successful! Welcome Admin.")
-            return True
-        else:
-            print("✗ Incorrect Username or Password!")
-            return False
+        return self.cursor.fetchone() is not None
 
     # ---------------- ROOM MANAGEMENT ----------------
     def add_room(self):
@@ -133,44 +154,44 @@ class HotelManagementSystem:
         capacity = int(input("Capacity (number of guests): "))
 
         try:
-            self.cursor.execute(
-                "INSERT INTO rooms (room_number, room_type, price, capacity) VALUES (?, ?, ?, ?)",
-                (room_number, room_type, price, capacity))
+            self.batch_add_room({"room_number": room_number, "room_type": room_type,
+                                 "price": price, "capacity": capacity})
             self.conn.commit()
             print(f"✓ Room {room_number} added successfully!")
         except sqlite3.IntegrityError:
+            self.conn.rollback()
             print("✗ Error: Room number already exists!")
 
     def view_all_rooms(self):
-        self.cursor.execute("SELECT * FROM rooms")
-        rooms = self.cursor.fetchall()
-
-        if rooms:
-            print("\n" + "="*80)
-            print("ID  Room No   Type            Price      Status        Capacity")
-            print("="*80)
-            for room in rooms:
-                print(f"{room[0]:<5} {room[1]:<10} {room[2]:<15} ${room[3]:<9.2f} {room[4]:<15} {room[5]:<10}")
-        else:
+        # Rows are printed straight from the cursor instead of fetchall()
+        count = 0
+        for room in self.cursor.execute("SELECT * FROM rooms"):
+            if count == 0:
+                print("\n" + "="*80)
+                print("ID  Room No   Type            Price      Status        Capacity")
+                print("="*80)
+            print(f"{room[0]:<5} {room[1]:<10} {room[2]:<15} ${room[3]:<9.2f} {room[4]:<15} {room[5]:<10}")
+            count += 1
+
+        if count == 0:
             print("No rooms found!")
 
     def view_available_rooms(self):
-        self.cursor.execute("SELECT * FROM rooms WHERE status = 'Available'")
-        rooms = self.cursor.fetchall()
-
-        if rooms:
-            print("\n" + "="*80)
-            print("ID  Room No   Type            Price      Capacity")
-            print("="*80)
-            for room in rooms:
-                print(f"{room[0]:<5} {room[1]:<10} {room[2]:<15} ${room[3]:<9.2f} {room[5]:<10}")
-        else:
+        count = 0
+        for room in self.cursor.execute("SELECT * FROM rooms WHERE status = 'Available'"):
+            if count == 0:
+                print("\n" + "="*80)
+                print("ID  Room No   Type            Price      Capacity")
+                print("="*80)
+            print(f"{room[0]:<5} {room[1]:<10} {room[2]:<15} ${room[3]:<9.2f} {room[5]:<10}")
+            count += 1
+
+        if count == 0:
             print("No available rooms!")
-        return rooms
+        return count
 
     # ---------------- GUEST MANAGEMENT ----------------
     def add_guest(self):
-        import re
         print("\n--- Add New Guest ---")
 
         name = input("Guest Name: ")
@@ -179,25 +200,19 @@ class HotelManagementSystem:
         address = input("Address: ")
         id_proof = input("Aadhaar Number (12-digit): ")
 
-        if not re.fullmatch(r"[6-9]\d{9}", phone):
-            print("✗ Invalid Mobile Number!")
-            return None
-
-        if not re.fullmatch(r"\d{12}", id_proof):
-            print("✗ Invalid Aadhaar!")
-            return None
-
         try:
-            self.cursor.execute(
-                "INSERT INTO guests (name, email, phone, address, id_proof) VALUES (?, ?, ?, ?, ?)",
-                (name, email, phone, address, id_proof)
-            )
+            guest_id = self.batch_add_guest({"name": name, "email": email, "phone": phone,
+                                             "address": address, "id_proof": id_proof})["guest_id"]
             self.conn.commit()
-            guest_id = self.cursor.lastrowid
             print(f"✓ Guest added successfully! Guest ID: {guest_id}")
             return guest_id
 
+        except BatchError as e:
+            print(f"✗ {e}!")
+            return None
+
         except sqlite3.IntegrityError:
+            self.conn.rollback()
             print("✗ Duplicate Email/Phone/Aadhaar!")
             return None
 
@@ -222,52 +237,204 @@ class HotelManagementSystem:
                 return
 
         room_id = int(input("Enter Room ID: "))
-        self.cursor.execute("SELECT price,status FROM rooms WHERE room_id=?", (room_id,))
-        room_data = self.cursor.fetchone()
-        if not room_data or room_data[1] != 'Available':
+        # Early check so the operator is not asked for dates first;
+        # batch_create_booking still decides
+        if not self.room_available(room_id):
             print("✗ Room not available!")
             return
 
-        price = room_data[0]
         check_in = input("Check-in (YYYY-MM-DD): ")
         check_out = input("Check-out (YYYY-MM-DD): ")
-        days = (datetime.strptime(check_out, '%Y-%m-%d') - datetime.strptime(check_in, '%Y-%m-%d')).days
-        total_amount = days * price
 
-        self.cursor.execute(
-            "INSERT INTO bookings (guest_id, room_id, check_in_date, check_out_date, total_amount) "
-            "VALUES (?, ?, ?, ?, ?)",
-            (guest_id, room_id, check_in, check_out, total_amount)
-        )
-        self.cursor.execute("UPDATE rooms SET status='Occupied' WHERE room_id=?", (room_id,))
+        try:
+            booking = self.batch_create_booking({"guest_id": guest_id, "room_id": room_id,
+                                                 "check_in": check_in, "check_out": check_out})
+        except ValueError as e:
+            self.conn.rollback()
+            print(f"✗ {e}!")
+            return
         self.conn.commit()
 
-        print("✓ Booking Successful!")
+        print(f"✓ Booking Successful! Booking ID: {booking['booking_id']}, Total: ${booking['total_amount']:.2f}")
 
     # ---------------- CHECKOUT ----------------
     def checkout(self):
         booking_id = int(input("\nEnter Booking ID: "))
 
+        try:
+            total_amount = self.booking_due(booking_id)[0]
+            print(f"Total Amount Due: ${total_amount:.2f}")
+            method = input("Payment Method (Cash/Card/UPI): ")
+            result = self.batch_checkout({"booking_id": booking_id, "payment_method": method})
+        except BatchError as e:
+            self.conn.rollback()
+            print(f"✗ {e}!")
+            return
+        self.conn.commit()
+        print(f"✓ Checkout Done! Room {result['room_number']} Available.")
+
+    # ---------------- BATCH MODE ----------------
+    # Core operations, without prompts or commits. Batch mode calls them from
+    # run_batch(); the menu collects input, calls them and commits, so both
+    # paths apply the same rules.
+    def batch_add_room(self, op):
+        self.cursor.execute(
+            "INSERT INTO rooms (room_number, room_type, price, capacity) VALUES (?, ?, ?, ?)",
+            (str(field(op, "room_number")), field(op, "room_type"),
+             float(field(op, "price")), int(field(op, "capacity"))))
+        return {"room_id": self.cursor.lastrowid}
+
+    def batch_add_guest(self, op):
+        phone, id_proof = str(field(op, "phone")), str(field(op, "id_proof"))
+        if not re.fullmatch(r"[6-9]\d{9}", phone):
+            raise BatchError("Invalid Mobile Number")
+        if not re.fullmatch(r"\d{12}", id_proof):
+            raise BatchError("Invalid Aadhaar")
+
+        self.cursor.execute(
+            "INSERT INTO guests (name, email, phone, address, id_proof) VALUES (?, ?, ?, ?, ?)",
+            (field(op, "name"), op.get("email"), phone, op.get("address"), id_proof))
+        return {"guest_id": self.cursor.lastrowid}
+
+    def batch_create_booking(self, op):
+        guest_id, room_id = int(field(op, "guest_id")), int(field(op, "room_id"))
+        self.cursor.execute("SELECT 1 FROM guests WHERE guest_id=?", (guest_id,))
+        if not self.cursor.fetchone():
+            raise BatchError("Guest not found")
+
+        self.cursor.execute("SELECT price,status FROM rooms WHERE room_id=?", (room_id,))
+        room_data = self.cursor.fetchone()
+        if not room_data or room_data[1] != 'Available':
+            raise BatchError("Room not available")
+
+        check_in, check_out = field(op, "check_in"), field(op, "check_out")
+        days = (datetime.strptime(check_out, '%Y-%m-%d') - datetime.strptime(check_in, '%Y-%m-%d')).days
+        if days <= 0:
+            raise BatchError("Check-out must be after check-in")
+        total_amount = days * room_data[0]
+
+        self.cursor.execute(
+            "INSERT INTO bookings (guest_id, room_id, check_in_date, check_out_date, total_amount) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (guest_id, room_id, check_in, check_out, total_amount))
+        booking_id = self.cursor.lastrowid
+        self.cursor.execute("UPDATE rooms SET status='Occupied' WHERE room_id=?", (room_id,))
+        return {"booking_id": booking_id, "total_amount": total_amount}
+
+    def room_available(self, room_id):
+        self.cursor.execute("SELECT status FROM rooms WHERE room_id=?", (room_id,))
+        room = self.cursor.fetchone()
+        return room is not None and room[0] == 'Available'
+
+    def booking_due(self, booking_id):
+        """(total_amount, room_id, room_number) of a booking that can still be checked out"""
         self.cursor.execute(
-            "SELECT b.total_amount,b.room_id,r.room_number FROM bookings b JOIN rooms r "
+            "SELECT b.total_amount,b.room_id,r.room_number,b.booking_status FROM bookings b JOIN rooms r "
             "ON b.room_id=r.room_id WHERE b.booking_id=?",
             (booking_id,))
         result = self.cursor.fetchone()
-
         if not result:
-            print("✗ Booking not found!")
-            return
+            raise BatchError("Booking not found")
+        if result[3] == 'Completed':
+            raise BatchError("Booking already checked out")
+        return result[:3]
 
-        total_amount, room_id, room_no = result
-        print(f"Total Amount Due: ${total_amount:.2f}")
-        method = input("Payment Method (Cash/Card/UPI): ")
+    def batch_checkout(self, op):
+        booking_id = int(field(op, "booking_id"))
+        total_amount, room_id, room_no = self.booking_due(booking_id)
 
         self.cursor.execute("INSERT INTO payments (booking_id,amount,payment_method) VALUES (?,?,?)",
-                            (booking_id, total_amount, method))
+                            (booking_id, total_amount, op.get("payment_method", "Cash")))
         self.cursor.execute("UPDATE bookings SET booking_status='Completed' WHERE booking_id=?", (booking_id,))
         self.cursor.execute("UPDATE rooms SET status='Available' WHERE room_id=?", (room_id,))
-        self.conn.commit()
-        print(f"✓ Checkout Done! Room {room_no} Available.")
+        return {"amount": total_amount, "room_number": room_no}
+
+    BATCH_OPERATIONS = {
+        "add_room": batch_add_room,
+        "add_guest": batch_add_guest,
+        "create_booking": batch_create_booking,
+        "checkout": batch_checkout,
+    }
+
+    def iter_rooms(self, status=None):
+        """Yield rooms as dicts straight from a cursor, without fetchall"""
+        cursor = self.conn.cursor()
+        if status:
+            cursor.execute("SELECT * FROM rooms WHERE status = ?", (status,))
+        else:
+            cursor.execute("SELECT * FROM rooms")
+        columns = [col[0] for col in cursor.description]
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+    def run_batch(self, lines, out=None, batch_size=100):
+        """
+        Run JSON-lines operations, e.g. {"op": "add_room", "room_number": "101", ...}.
+        Every batch_size operations are committed as one transaction; a failing
+        operation is rolled back on its own via a savepoint. One JSON result line
+        is written per operation once its group has been committed.
+        """
+        out = out or sys.stdout
+        pending = []
+        summary = {"status": "done", "ok": 0, "error": 0}
+
+        def flush():
+            self.conn.commit()
+            for result in pending:
+                out.write(json.dumps(result) + "\n")
+            pending.clear()
+
+        for line_no, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            result = {"line": line_no}
+            try:
+                op = json.loads(line)
+                if not isinstance(op, dict):
+                    raise BatchError("Operation must be a JSON object")
+                result["op"] = op.get("op")
+
+                if result["op"] == "list_rooms":
+                    flush()
+                    count = 0
+                    for room in self.iter_rooms(op.get("status")):
+                        out.write(json.dumps({"line": line_no, "op": "list_rooms", "room": room}) + "\n")
+                        count += 1
+                    result.update(status="ok", count=count)
+                    out.write(json.dumps(result) + "\n")
+                    summary["ok"] += 1
+                    continue
+
+                handler = self.BATCH_OPERATIONS.get(result["op"])
+                if handler is None:
+                    raise BatchError(f"Unknown operation: {result['op']}")
+
+                if not self.conn.in_transaction:
+                    self.cursor.execute("BEGIN")
+                self.cursor.execute("SAVEPOINT batch_op")
+                try:
+                    result.update(handler(self, op))
+                except Exception:
+                    self.cursor.execute("ROLLBACK TO batch_op")
+                    raise
+                finally:
+                    self.cursor.execute("RELEASE batch_op")
+                result["status"] = "ok"
+            except KeyError as e:
+                result.update(status="error", error=f"Missing field: {e.args[0]}")
+            except (ValueError, TypeError, sqlite3.Error) as e:
+                result.update(status="error", error=str(e))
+
+            summary[result["status"]] += 1
+            pending.append(result)
+            if len(pending) >= batch_size:
+                flush()
+
+        flush()
+        out.write(json.dumps(summary) + "\n")
+        return summary
 
     # ---------------- EXIT ----------------
     def close(self):
@@ -276,8 +443,37 @@ class HotelManagementSystem:
             print("✓ Database Closed")
 
 
+def run_batch_mode(path, batch_size, db_name):
+    hms = HotelManagementSystem(db_name, verbose=False)
+
+    # No prompts in batch mode: credentials come from the environment
+    if not hms.check_admin(os.getenv("HMS_USERNAME", ""), os.getenv("HMS_PASSWORD", "")):
+        print("✗ Set HMS_USERNAME and HMS_PASSWORD to valid admin credentials", file=sys.stderr)
+        hms.conn.close()
+        return 1
+
+    if path == "-":
+        summary = hms.run_batch(sys.stdin, batch_size=batch_size)
+    else:
+        with open(path, encoding="utf-8") as f:
+            summary = hms.run_batch(f, batch_size=batch_size)
+    hms.conn.close()
+    return 1 if summary["error"] else 0
+
+
 def main():
-    hms = HotelManagementSystem()
+    parser = argparse.ArgumentParser(description="Hotel Management System")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run JSON-lines operations from FILE ('-' for stdin) instead of the menu")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="operations committed per transaction in batch mode (default: 100)")
+    parser.add_argument("--db", default="hotel_management.db", help="database file")
+    args = parser.parse_args()
+
+    if args.batch:
+        sys.exit(run_batch_mode(args.batch, args.batch_size, args.db))
+
+    hms = HotelManagementSystem(args.db)
 
     # Require Admin Login
     if not hms.admin_login():
@@ -0,0 +1,309 @@
+"""
+Night audit scheduler for the Hotel Management System.
+
+Runs the offline bookkeeping jobs once per night inside the quiet-hours
+window: flagging overdue bookings, precomputing revenue/occupancy
+summaries and SQLite maintenance. Every run is recorded in `job_runs`
+with its duration, and a row in `job_locks` makes sure only one worker
+executes a job at a time, even with several gunicorn workers or a
+separate worker process pointed at the same database.
+
+Usage:
+    python night_audit.py          # run as a worker, polling every minute
+    python night_audit.py --now    # run every job once immediately
+"""
+
+import sqlite3
+import os
+import sys
+import time
+import socket
+import threading
+from datetime import datetime, date, timedelta, timezone
+
+
+def get_db_connection(db_path=None):
+    """Connect to the same database the web app uses"""
+    conn = sqlite3.connect(db_path or os.getenv('DATABASE_PATH', 'hotel_management.db'), timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_audit_tables(conn):
+    """Create the scheduler and summary tables"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_runs (
+            run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_name VARCHAR(50) NOT NULL,
+            worker VARCHAR(100) NOT NULL,
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP,
+            duration_ms INTEGER,
+            status VARCHAR(20) NOT NULL,
+            detail TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_job_started ON job_runs (job_name, started_at)")
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_locks (
+            job_name VARCHAR(50) PRIMARY KEY,
+            owner VARCHAR(100) NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_summaries (
+            summary_date DATE PRIMARY KEY,
+            total_revenue DECIMAL(10,2) NOT NULL,
+            revenue_day DECIMAL(10,2) NOT NULL,
+            revenue_through TIMESTAMP NOT NULL,
+            total_rooms INTEGER NOT NULL,
+            occupied_rooms INTEGER NOT NULL,
+            occupancy_rate REAL NOT NULL,
+            active_bookings INTEGER NOT NULL,
+            overdue_bookings INTEGER NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+# --------------------- JOBS ---------------------
+
+def flag_overdue_bookings(conn):
+    """Mark confirmed bookings whose check-out date has passed as Overdue"""
+    cur = conn.execute("UPDATE bookings SET booking_status='Overdue' "
+                       "WHERE booking_status='Confirmed' AND check_out_date < ?",
+                       (date.today().isoformat(),))
+    return f"{cur.rowcount} booking(s) flagged overdue"
+
+
+def day_bounds_utc(day):
+    """UTC start/end of a local calendar day, in the same format as CURRENT_TIMESTAMP"""
+    start = datetime.combine(day, datetime.min.time()).astimezone(timezone.utc)
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time()).astimezone(timezone.utc)
+    return start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def compute_daily_summary(conn):
+    """Precompute revenue for the day that just closed and the current occupancy"""
+    day = date.today() - timedelta(days=1)
+    # payment_date is stored in UTC, so compare against the UTC bounds of the local day
+    start, end = day_bounds_utc(day)
+    total_revenue = conn.execute("SELECT SUM(amount) FROM payments WHERE payment_date < ?",
+                                 (end,)).fetchone()[0] or 0
+    revenue_day = conn.execute("SELECT SUM(amount) FROM payments WHERE payment_date >= ? AND payment_date < ?",
+                               (start, end)).fetchone()[0] or 0
+    total_rooms = conn.execute("SELECT COUNT(*) FROM rooms").fetchone()[0]
+    occupied = conn.execute("SELECT COUNT(*) FROM rooms WHERE status='Occupied'").fetchone()[0]
+    active = conn.execute("SELECT COUNT(*) FROM bookings WHERE booking_status='Confirmed'").fetchone()[0]
+    overdue = conn.execute("SELECT COUNT(*) FROM bookings WHERE booking_status='Overdue'").fetchone()[0]
+    rate = (occupied / total_rooms * 100) if total_rooms else 0
+
+    conn.execute('''
+        INSERT OR REPLACE INTO daily_summaries
+            (summary_date, total_revenue, revenue_day, revenue_through, total_rooms, occupied_rooms,
+             occupancy_rate, active_bookings, overdue_bookings, computed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ''', (day.isoformat(), total_revenue, revenue_day, end, total_rooms, occupied, rate, active, overdue))
+    return f"{day}: occupancy {rate:.1f}%, revenue ${revenue_day:.2f}"
+
+
+def run_maintenance(conn):
+    """PRAGMA optimize, incremental vacuum and WAL checkpoint"""
+    # These must run outside a transaction; the scheduler commits before each job.
+    conn.execute("PRAGMA optimize")
+    details = ["optimize done"]
+
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # auto_vacuum=INCREMENTAL only takes effect on an existing database after a full VACUUM
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        details.append("switched to incremental auto_vacuum (full VACUUM)")
+    else:
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+        freed = free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        details.append(f"incremental_vacuum freed {freed} page(s)")
+
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if journal_mode != "wal":
+        details.append(f"wal_checkpoint skipped (journal_mode={journal_mode})")
+    else:
+        busy, log_frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            details.append(f"wal_checkpoint blocked by readers ({checkpointed}/{log_frames} frames)")
+        else:
+            details.append(f"wal_checkpoint wrote {checkpointed} frame(s)")
+    return ", ".join(details)
+
+
+# Run in this order each night
+JOBS = [
+    ("flag_overdue_bookings", flag_overdue_bookings),
+    ("daily_summary", compute_daily_summary),
+    ("db_maintenance", run_maintenance),
+]
+
+
+# --------------------- READERS ---------------------
+
+def latest_summary(conn):
+    """Most recent night-audit summary, or None if the audit has not run yet"""
+    try:
+        return conn.execute("SELECT * FROM daily_summaries ORDER BY summary_date DESC LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        # Database created before the night audit existed
+        return None
+
+
+def total_revenue(conn, summary=None):
+    """Revenue up to the last audit plus payments made since, instead of summing every payment"""
+    summary = summary or latest_summary(conn)
+    if summary is None:
+        return conn.execute("SELECT SUM(amount) FROM payments").fetchone()[0] or 0
+    since = conn.execute("SELECT SUM(amount) FROM payments WHERE payment_date >= ?",
+                         (summary["revenue_through"],)).fetchone()[0] or 0
+    return summary["total_revenue"] + since
+
+
+# --------------------- SCHEDULER ---------------------
+
+class NightAuditScheduler:
+    def __init__(self, db_path=None, quiet_start=None, quiet_end=None, poll_seconds=60, lock_ttl=3600):
+        self.db_path = db_path
+        self.quiet_start = self._parse_time(quiet_start or os.getenv('NIGHT_AUDIT_START', '02:00'))
+        self.quiet_end = self._parse_time(quiet_end or os.getenv('NIGHT_AUDIT_END', '05:00'))
+        self.poll_seconds = poll_seconds
+        self.lock_ttl = lock_ttl
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._thread = None
+
+        conn = get_db_connection(self.db_path)
+        # WAL lets the web app keep reading while the audit writes; the mode is
+        # stored in the database file, so setting it once at startup is enough
+        conn.execute("PRAGMA journal_mode=WAL")
+        init_audit_tables(conn)
+        conn.close()
+
+    @staticmethod
+    def _parse_time(value):
+        return datetime.strptime(value, "%H:%M").time()
+
+    def window_start(self, now=None):
+        """Start of the current quiet-hours window, or None outside it"""
+        now = now or datetime.now()
+        start = datetime.combine(now.date(), self.quiet_start)
+        end = datetime.combine(now.date(), self.quiet_end)
+        if self.quiet_start <= self.quiet_end:
+            return start if start <= now < end else None
+        # Window crosses midnight, e.g. 23:00 - 04:00
+        if now >= start:
+            return start
+        if now < end:
+            return start - timedelta(days=1)
+        return None
+
+    # ---------------- LOCKING ----------------
+    def acquire_lock(self, conn, job_name):
+        now = time.time()
+        cur = conn.execute('''
+            INSERT INTO job_locks (job_name, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(job_name) DO UPDATE SET owner=excluded.owner, expires_at=excluded.expires_at
+            WHERE job_locks.expires_at < ? OR job_locks.owner = excluded.owner
+        ''', (job_name, self.worker, now + self.lock_ttl, now))
+        conn.commit()
+        return cur.rowcount == 1
+
+    def release_lock(self, conn, job_name):
+        conn.execute("DELETE FROM job_locks WHERE job_name=? AND owner=?", (job_name, self.worker))
+        conn.commit()
+
+    # ---------------- RUNNING ----------------
+    def has_run_since(self, conn, job_name, since):
+        row = conn.execute("SELECT 1 FROM job_runs WHERE job_name=? AND status='success' AND started_at >= ?",
+                           (job_name, since.isoformat(timespec='seconds'))).fetchone()
+        return row is not None
+
+    def run_job(self, conn, job_name, func):
+        """Execute one job and record it in job_runs"""
+        started = datetime.now().isoformat(timespec='seconds')
+        cur = conn.execute("INSERT INTO job_runs (job_name, worker, started_at, status) VALUES (?, ?, ?, 'running')",
+                           (job_name, self.worker, started))
+        run_id = cur.lastrowid
+        conn.commit()
+
+        t0 = time.perf_counter()
+        try:
+            detail = func(conn)
+            conn.commit()
+            status = 'success'
+        except Exception as e:
+            conn.rollback()
+            detail = f"{type(e).__name__}: {e}"
+            status = 'failed'
+        duration_ms = int((time.perf_counter() - t0) * 1000)
+
+        conn.execute("UPDATE job_runs SET finished_at=?, duration_ms=?, status=?, detail=? WHERE run_id=?",
+                     (datetime.now().isoformat(timespec='seconds'), duration_ms, status, detail, run_id))
+        conn.commit()
+
+        mark = "✓" if status == 'success' else "✗"
+        print(f"{mark} {job_name}: {detail} ({duration_ms} ms)")
+        return status
+
+    def run_pending(self, force=False):
+        """Run every job that has not yet succeeded in the current window"""
+        since = self.window_start()
+        if since is None and not force:
+            return
+
+        conn = get_db_connection(self.db_path)
+        try:
+            for job_name, func in JOBS:
+                if not self.acquire_lock(conn, job_name):
+                    continue
+                try:
+                    if force or not self.has_run_since(conn, job_name, since):
+                        self.run_job(conn, job_name, func)
+                finally:
+                    self.release_lock(conn, job_name)
+        finally:
+            conn.close()
+
+    def run_forever(self):
+        print(f"✓ Night audit worker {self.worker} started "
+              f"(quiet hours {self.quiet_start:%H:%M}-{self.quiet_end:%H:%M})")
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                # Keep the worker alive; the next poll retries
+                print(f"✗ Night audit error: {type(e).__name__}: {e}")
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        """Run the scheduler in a background thread of the current process"""
+        self._thread = threading.Thread(target=self.run_forever, name="night-audit", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+def main():
+    scheduler = NightAuditScheduler()
+    if "--now" in sys.argv[1:]:
+        scheduler.run_pending(force=True)
+    else:
+        scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Server-side room search for the /rooms page.
+
+Builds the filtered room query and the facet-count query, and owns the
+indexes behind them. Each query names the index it must use (INDEXED BY),
+picked from the filters that are set, so the plan cannot fall back to a
+full table scan once ANALYZE statistics exist (PRAGMA optimize in the
+night audit can run ANALYZE). The only queries that read every room are
+the ones with nothing to filter on: the unfiltered room list and the facet
+counts without a capacity or price range.
+"""
+
+# Composite indexes backing the filters and facet counts
+ROOM_INDEXES = {
+    "idx_rooms_type_status": "rooms (room_type, status, capacity, price)",
+    "idx_rooms_status_capacity": "rooms (status, capacity, price)",
+    "idx_rooms_capacity_search": "rooms (capacity, price, room_type, status)",
+    "idx_rooms_price_search": "rooms (price, capacity, room_type, status)",
+}
+
+ROOM_SORTS = {
+    "id": "room_id",
+    "number": "room_number",
+    "price_asc": "price ASC",
+    "price_desc": "price DESC",
+    "capacity": "capacity DESC, price ASC",
+}
+
+
+def create_room_indexes(cursor):
+    for name, columns in ROOM_INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+
+
+def where_clause(clauses):
+    return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+
+def range_index(filters):
+    """Index for the capacity/price range filters; both also cover the facet columns"""
+    if filters.get("capacity") is not None:
+        return "idx_rooms_capacity_search"
+    if filters.get("min_price") is not None or filters.get("max_price") is not None:
+        return "idx_rooms_price_search"
+    return None
+
+
+def build_room_search(filters):
+    """Return (rooms_sql, rooms_params, facet_sql, facet_params) for the /rooms filters"""
+    # Capacity and price narrow every facet; type and status only narrow each other
+    range_clauses, range_params = [], []
+    if filters.get("capacity") is not None:
+        range_clauses.append("capacity >= ?")
+        range_params.append(filters["capacity"])
+    if filters.get("min_price") is not None:
+        range_clauses.append("price >= ?")
+        range_params.append(filters["min_price"])
+    if filters.get("max_price") is not None:
+        range_clauses.append("price <= ?")
+        range_params.append(filters["max_price"])
+
+    clauses, params = list(range_clauses), list(range_params)
+    if filters.get("room_type"):
+        clauses.append("room_type = ?")
+        params.append(filters["room_type"])
+    if filters.get("status"):
+        clauses.append("status = ?")
+        params.append(filters["status"])
+
+    if filters.get("room_type"):
+        index = "idx_rooms_type_status"
+    elif filters.get("status"):
+        index = "idx_rooms_status_capacity"
+    else:
+        index = range_index(filters)
+    rooms_from = f"rooms INDEXED BY {index}" if index else "rooms"
+
+    facet_index = range_index(filters)
+    facet_from = f"rooms INDEXED BY {facet_index}" if facet_index else "rooms"
+
+    sort = ROOM_SORTS.get(filters.get("sort"), ROOM_SORTS["id"])
+    rooms_sql = f"SELECT * FROM {rooms_from}{where_clause(clauses)} ORDER BY {sort}"
+    facet_sql = (f"SELECT room_type, status, COUNT(*) AS n FROM {facet_from}{where_clause(range_clauses)}"
+                 " GROUP BY room_type, status")
+    return rooms_sql, params, facet_sql, range_params
+
+
+def facet_counts(grouped, filters):
+    """Fold (room_type, status, n) rows into sorted per-type and per-status counts"""
+    type_counts, status_counts = {}, {}
+    for room_type, status, n in grouped:
+        if not filters.get("status") or status == filters["status"]:
+            type_counts[room_type] = type_counts.get(room_type, 0) + n
+        if not filters.get("room_type") or room_type == filters["room_type"]:
+            status_counts[status] = status_counts.get(status, 0) + n
+    # Keep the active filters listed even with no matches, so the form still shows them
+    if filters.get("room_type"):
+        type_counts.setdefault(filters["room_type"], 0)
+    if filters.get("status"):
+        status_counts.setdefault(filters["status"], 0)
+    return sorted(type_counts.items()), sorted(status_counts.items())
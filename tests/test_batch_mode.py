@@ -0,0 +1,132 @@
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from hotel_management import BatchError, HotelManagementSystem, run_batch_mode
+
+ROOM_101 = {"op": "add_room", "room_number": "101", "room_type": "Single", "price": 50, "capacity": 1}
+ROOM_102 = {"op": "add_room", "room_number": "102", "room_type": "Double", "price": 80, "capacity": 2}
+GUEST = {"op": "add_guest", "name": "Asha", "phone": "9876543210", "id_proof": "123412341234"}
+BOOKING = {"op": "create_booking", "guest_id": 1, "room_id": 1, "check_in": "2026-10-01", "check_out": "2026-10-04"}
+
+
+class BatchModeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "test.db")
+        self.hms = HotelManagementSystem(self.db_path, verbose=False)
+
+    def tearDown(self):
+        self.hms.conn.close()
+        self.tmp.cleanup()
+
+    def run_lines(self, lines, batch_size=100):
+        out = io.StringIO()
+        summary = self.hms.run_batch(lines, out=out, batch_size=batch_size)
+        return summary, [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def query(self, sql):
+        # A separate connection only sees committed data
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def test_bad_line_leaves_neighbours_committed(self):
+        duplicate = dict(ROOM_101)
+        summary, results = self.run_lines([json.dumps(ROOM_101), json.dumps(duplicate), json.dumps(ROOM_102)])
+
+        self.assertEqual([r["status"] for r in results[:3]], ["ok", "error", "ok"])
+        self.assertIn("UNIQUE", results[1]["error"])
+        self.assertEqual(self.query("SELECT room_number FROM rooms ORDER BY room_number"), [("101",), ("102",)])
+        self.assertEqual((summary["ok"], summary["error"]), (2, 1))
+
+    def test_failing_operation_rolls_back_its_own_writes_only(self):
+        def half_done(hms, op):
+            hms.batch_add_room(dict(ROOM_102, room_number="999"))
+            raise BatchError("Failed after writing")
+
+        lines = [json.dumps(ROOM_101), json.dumps({"op": "half_done"}), json.dumps(ROOM_102)]
+        with mock.patch.dict(HotelManagementSystem.BATCH_OPERATIONS, {"half_done": half_done}):
+            summary, results = self.run_lines(lines)
+
+        self.assertEqual([r["status"] for r in results[:3]], ["ok", "error", "ok"])
+        self.assertEqual(self.query("SELECT room_number FROM rooms ORDER BY room_number"), [("101",), ("102",)])
+
+    def test_results_carry_input_line_numbers(self):
+        lines = ["# comment", json.dumps(ROOM_101), "", "not json", json.dumps({"op": "nope"}), json.dumps(ROOM_102)]
+        summary, results = self.run_lines(lines, batch_size=2)
+
+        self.assertEqual([r["line"] for r in results[:-1]], [2, 4, 5, 6])
+        self.assertEqual([r.get("op") for r in results[:-1]], ["add_room", None, "nope", "add_room"])
+        self.assertEqual(results[-1], {"status": "done", "ok": 2, "error": 2})
+
+    def test_second_checkout_is_an_error(self):
+        checkout = json.dumps({"op": "checkout", "booking_id": 1, "payment_method": "UPI"})
+        lines = [json.dumps(ROOM_101), json.dumps(GUEST), json.dumps(BOOKING), checkout, checkout]
+        summary, results = self.run_lines(lines)
+
+        self.assertEqual(results[3]["status"], "ok")
+        self.assertEqual(results[3]["amount"], 150)
+        self.assertEqual(results[4], {"line": 5, "op": "checkout", "status": "error",
+                                      "error": "Booking already checked out"})
+        self.assertEqual(self.query("SELECT amount FROM payments"), [(150,)])
+
+    def test_null_and_structured_fields_are_missing(self):
+        lines = [json.dumps(dict(ROOM_101, room_number=None)),
+                 json.dumps(dict(ROOM_101, room_type=["Single"])),
+                 json.dumps(dict(GUEST, phone=None))]
+        summary, results = self.run_lines(lines)
+
+        self.assertEqual([r["error"] for r in results[:3]],
+                         ["Missing field: room_number", "Missing field: room_type", "Missing field: phone"])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM rooms"), [(0,)])
+
+    def test_results_are_written_after_their_group_commits(self):
+        committed_at_write = []
+
+        class Recorder(io.StringIO):
+            def write(inner, text):
+                committed_at_write.append(self.query("SELECT COUNT(*) FROM rooms")[0][0])
+                return super().write(text)
+
+        rooms = [json.dumps(dict(ROOM_101, room_number=str(n))) for n in range(1, 6)]
+        self.hms.run_batch(rooms, out=Recorder(), batch_size=2)
+
+        # Each result line is written once its room is visible to other connections
+        self.assertEqual(committed_at_write[:5], [2, 2, 4, 4, 5])
+
+    def test_list_rooms_streams_one_line_per_room(self):
+        lines = [json.dumps(ROOM_101), json.dumps(ROOM_102), json.dumps({"op": "list_rooms", "status": "Available"})]
+        summary, results = self.run_lines(lines)
+
+        listed = [r["room"]["room_number"] for r in results if "room" in r]
+        self.assertEqual(listed, ["101", "102"])
+        self.assertEqual(results[-2], {"line": 3, "op": "list_rooms", "status": "ok", "count": 2})
+
+    def test_exit_code(self):
+        path = os.path.join(self.tmp.name, "ops.jsonl")
+        credentials = {"HMS_USERNAME": "admin", "HMS_PASSWORD": "admin123"}
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(ROOM_101) + "\n")
+        with mock.patch.dict(os.environ, credentials), contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(run_batch_mode(path, 100, self.db_path), 0)
+
+        # Same room again fails
+        with mock.patch.dict(os.environ, credentials), contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(run_batch_mode(path, 100, self.db_path), 1)
+
+        with mock.patch.dict(os.environ, {"HMS_USERNAME": "admin", "HMS_PASSWORD": "wrong"}), \
+                contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(run_batch_mode(path, 100, self.db_path), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+app_module = None
+
+
+def setUpModule():
+    global app_module, db_dir
+    db_dir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_PATH"] = os.path.join(db_dir.name, "test.db")
+    import app
+    app_module = app
+
+    conn = app.get_db_connection()
+    conn.execute("INSERT INTO rooms (room_number, room_type, price, capacity) VALUES ('101', 'Suite', 250, 2)")
+    conn.executemany("INSERT INTO guests (name, email, phone, address, id_proof) VALUES (?, ?, ?, ?, ?)",
+                     [(f"Gäste Ñame {i} 日本", f"g{i}@example.com", f"98765{i:05d}", "Address", f"{i:012d}")
+                      for i in range(1500)])
+    conn.execute("INSERT INTO bookings (guest_id, room_id, check_in_date, check_out_date, total_amount) "
+                 "VALUES (1, 1, '2026-01-01', '2026-01-03', 500)")
+    conn.execute("INSERT INTO staff (name, position, phone, salary, hire_date) "
+                 "VALUES ('Zoë', 'Manager', '9876500000', 50000, '2024-01-01')")
+    conn.commit()
+    conn.close()
+
+
+def tearDownModule():
+    os.environ.pop("DATABASE_PATH", None)
+    db_dir.cleanup()
+
+
+class ListStreamingTest(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        with self.client.session_transaction() as session:
+            session["logged_in"] = True
+
+    def test_streamed_pages_match_buffered_pages(self):
+        for path, separator in (("/guests", "?"), ("/bookings", "?"), ("/staff", "?"),
+                                ("/guests/search?q=Ñame 1", "&")):
+            buffered = self.client.get(path)
+            streamed = self.client.get(path + separator + "stream=1", buffered=False)
+            chunks = list(streamed.response)
+            streamed.close()
+
+            self.assertEqual(buffered.status_code, 200, path)
+            self.assertEqual(streamed.status_code, 200, path)
+            self.assertEqual(b"".join(chunks), buffered.data, path)
+
+    def test_chunks_are_bounded_in_bytes(self):
+        response = self.client.get("/guests?stream=1", buffered=False)
+        chunks = list(response.response)
+        response.close()
+
+        self.assertGreater(len(chunks), 1)
+        # A chunk is flushed as soon as it reaches the limit, so only the last
+        # template piece can push it over
+        for chunk in chunks[:-1]:
+            self.assertGreaterEqual(len(chunk), app_module.STREAM_CHUNK_SIZE)
+            self.assertLess(len(chunk), app_module.STREAM_CHUNK_SIZE * 2)
+
+
+class StreamingConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.connections = []
+        get_db_connection = app_module.get_db_connection
+
+        def tracked_connection():
+            conn = mock.Mock(wraps=get_db_connection())
+            self.connections.append(conn)
+            return conn
+
+        patcher = mock.patch.object(app_module, "get_db_connection", tracked_connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_all_closed(self):
+        self.assertTrue(self.connections)
+        for conn in self.connections:
+            conn.close.assert_called()
+
+    def test_connection_closed_after_full_stream(self):
+        with app_module.app.test_request_context("/staff?stream=1"):
+            response = app_module.render_rows("staff.html", "staff", "SELECT * FROM staff")
+            b"".join(response.response)
+        self.assert_all_closed()
+
+    def test_connection_closed_when_response_is_never_read(self):
+        with app_module.app.test_request_context("/staff?stream=1"):
+            response = app_module.render_rows("staff.html", "staff", "SELECT * FROM staff")
+            response.close()
+        self.assert_all_closed()
+
+    def test_connection_closed_when_template_fails(self):
+        with app_module.app.test_request_context("/staff?stream=1"):
+            response = app_module.render_rows("missing.html", "staff", "SELECT * FROM staff")
+            with self.assertRaises(Exception):
+                b"".join(response.response)
+        self.assert_all_closed()
+
+
+if __name__ == "__main__":
+    unittest.main()
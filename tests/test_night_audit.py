@@ -0,0 +1,144 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import night_audit
+from night_audit import NightAuditScheduler, get_db_connection, total_revenue
+
+
+class NightAuditTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "test.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def scheduler(self, worker, **kwargs):
+        scheduler = NightAuditScheduler(self.db_path, **kwargs)
+        scheduler.worker = worker
+        return scheduler
+
+
+class WindowTest(NightAuditTestCase):
+    def test_window_within_one_day(self):
+        scheduler = self.scheduler("a", quiet_start="02:00", quiet_end="05:00")
+        self.assertEqual(scheduler.window_start(datetime(2026, 3, 10, 3, 30)), datetime(2026, 3, 10, 2, 0))
+        self.assertIsNone(scheduler.window_start(datetime(2026, 3, 10, 5, 0)))
+        self.assertIsNone(scheduler.window_start(datetime(2026, 3, 10, 1, 59)))
+
+    def test_window_crossing_midnight(self):
+        scheduler = self.scheduler("a", quiet_start="23:00", quiet_end="04:00")
+        self.assertEqual(scheduler.window_start(datetime(2026, 3, 10, 23, 30)), datetime(2026, 3, 10, 23, 0))
+        # After midnight the window still belongs to the previous evening
+        self.assertEqual(scheduler.window_start(datetime(2026, 3, 11, 3, 0)), datetime(2026, 3, 10, 23, 0))
+        self.assertIsNone(scheduler.window_start(datetime(2026, 3, 11, 12, 0)))
+
+
+class LockTest(NightAuditTestCase):
+    def test_second_owner_waits_until_release(self):
+        first, second = self.scheduler("worker-a"), self.scheduler("worker-b")
+        conn = get_db_connection(self.db_path)
+
+        self.assertTrue(first.acquire_lock(conn, "daily_summary"))
+        self.assertFalse(second.acquire_lock(conn, "daily_summary"))
+        # The owner may renew its own lock
+        self.assertTrue(first.acquire_lock(conn, "daily_summary"))
+
+        first.release_lock(conn, "daily_summary")
+        self.assertTrue(second.acquire_lock(conn, "daily_summary"))
+        conn.close()
+
+    def test_stale_lock_can_be_taken_over(self):
+        crashed = self.scheduler("worker-a", lock_ttl=-1)
+        other = self.scheduler("worker-b")
+        conn = get_db_connection(self.db_path)
+
+        self.assertTrue(crashed.acquire_lock(conn, "daily_summary"))
+        self.assertTrue(other.acquire_lock(conn, "daily_summary"))
+        owner = conn.execute("SELECT owner FROM job_locks WHERE job_name='daily_summary'").fetchone()[0]
+        self.assertEqual(owner, "worker-b")
+        conn.close()
+
+
+class RunPendingTest(NightAuditTestCase):
+    def run_pending(self, scheduler, jobs, **kwargs):
+        with mock.patch.object(night_audit, "JOBS", jobs), contextlib.redirect_stdout(io.StringIO()):
+            scheduler.run_pending(**kwargs)
+
+    def test_job_runs_once_per_window(self):
+        scheduler = self.scheduler("worker-a")
+        scheduler.window_start = lambda now=None: datetime(2000, 1, 1, 2, 0)
+        calls = []
+        jobs = [("counter", lambda conn: calls.append(1) or "counted")]
+
+        self.run_pending(scheduler, jobs)
+        self.run_pending(scheduler, jobs)
+        self.assertEqual(len(calls), 1)
+
+        # --now ignores the run history
+        self.run_pending(scheduler, jobs, force=True)
+        self.assertEqual(len(calls), 2)
+
+    def test_nothing_runs_outside_window(self):
+        scheduler = self.scheduler("worker-a")
+        scheduler.window_start = lambda now=None: None
+        calls = []
+
+        self.run_pending(scheduler, [("counter", lambda conn: calls.append(1) or "counted")])
+        self.assertEqual(calls, [])
+
+    def test_failed_job_is_recorded_and_later_jobs_still_run(self):
+        scheduler = self.scheduler("worker-a")
+        calls = []
+        jobs = [("broken", lambda conn: 1 / 0), ("after", lambda conn: calls.append(1) or "ran")]
+
+        self.run_pending(scheduler, jobs, force=True)
+
+        conn = get_db_connection(self.db_path)
+        row = conn.execute("SELECT * FROM job_runs WHERE job_name='broken'").fetchone()
+        self.assertEqual(row["status"], "failed")
+        self.assertIsNotNone(row["finished_at"])
+        self.assertIn("ZeroDivisionError", row["detail"])
+        self.assertEqual(calls, [1])
+        # The lock is released even though the job failed
+        self.assertIsNone(conn.execute("SELECT 1 FROM job_locks WHERE job_name='broken'").fetchone())
+        conn.close()
+
+
+class TotalRevenueTest(NightAuditTestCase):
+    def setUp(self):
+        super().setUp()
+        self.scheduler("worker-a")
+        self.conn = get_db_connection(self.db_path)
+        self.conn.execute("CREATE TABLE payments (amount DECIMAL(10,2) NOT NULL, payment_date TIMESTAMP)")
+        self.conn.executemany("INSERT INTO payments (amount, payment_date) VALUES (?, ?)",
+                              [(100, "2026-03-09 12:00:00"), (40, "2026-03-09 23:59:59"),
+                               (25, "2026-03-10 00:00:00"), (10, "2026-03-10 08:00:00")])
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        super().tearDown()
+
+    def test_without_summary_sums_every_payment(self):
+        self.assertEqual(total_revenue(self.conn), 175)
+
+    def test_summary_total_plus_payments_from_cutoff(self):
+        # The stored total deliberately differs from the raw sum to show it is used
+        self.conn.execute('''
+            INSERT INTO daily_summaries
+                (summary_date, total_revenue, revenue_day, revenue_through, total_rooms, occupied_rooms,
+                 occupancy_rate, active_bookings, overdue_bookings)
+            VALUES ('2026-03-09', 1000, 140, '2026-03-10 00:00:00', 0, 0, 0, 0, 0)
+        ''')
+        self.conn.commit()
+        self.assertEqual(total_revenue(self.conn), 1000 + 25 + 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
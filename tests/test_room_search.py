@@ -0,0 +1,127 @@
+import itertools
+import random
+import sqlite3
+import unittest
+
+from room_search import ROOM_SORTS, create_room_indexes, build_room_search, facet_counts
+
+ROOMS_TABLE = '''
+    CREATE TABLE rooms (
+        room_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_number VARCHAR(10) UNIQUE NOT NULL,
+        room_type VARCHAR(50) NOT NULL,
+        price DECIMAL(10,2) NOT NULL,
+        status VARCHAR(20) DEFAULT 'Available',
+        capacity INTEGER NOT NULL
+    )
+'''
+
+FILTER_VALUES = {
+    "room_type": "Double",
+    "status": "Available",
+    "capacity": 2,
+    "min_price": 100.0,
+    "max_price": 200.0,
+}
+
+RANGE_FILTERS = ("capacity", "min_price", "max_price")
+
+
+def make_db(rooms=0):
+    conn = sqlite3.connect(":memory:")
+    conn.execute(ROOMS_TABLE)
+    create_room_indexes(conn.cursor())
+    rng = random.Random(1)
+    for i in range(rooms):
+        conn.execute("INSERT INTO rooms (room_number, room_type, price, status, capacity) VALUES (?, ?, ?, ?, ?)",
+                     (str(100 + i), rng.choice(["Single", "Double", "Suite", "Deluxe"]), rng.randint(40, 400),
+                      rng.choice(["Available", "Occupied"]), rng.randint(1, 4)))
+    if rooms:
+        # Same statistics PRAGMA optimize in the night audit may gather
+        conn.execute("ANALYZE")
+    return conn
+
+
+def filter_combinations():
+    for n in range(1, len(FILTER_VALUES) + 1):
+        for keys in itertools.combinations(FILTER_VALUES, n):
+            for sort in ROOM_SORTS:
+                filters = {key: FILTER_VALUES[key] for key in keys}
+                filters["sort"] = sort
+                yield filters
+
+
+class RoomSearchPlanTest(unittest.TestCase):
+    def assert_no_scan(self, conn, sql, params, filters):
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        scans = [step for step in plan if step.startswith("SCAN rooms")]
+        self.assertEqual(scans, [], f"{filters}: {sql} -> {plan}")
+
+    def check_plans(self, conn):
+        for filters in filter_combinations():
+            rooms_sql, params, facet_sql, facet_params = build_room_search(filters)
+            self.assert_no_scan(conn, rooms_sql, params, filters)
+            # Facets without a capacity/price range count every room by definition
+            if any(key in filters for key in RANGE_FILTERS):
+                self.assert_no_scan(conn, facet_sql, facet_params, filters)
+
+    def test_no_full_scans_without_statistics(self):
+        self.check_plans(make_db())
+
+    def test_no_full_scans_after_analyze(self):
+        self.check_plans(make_db(rooms=500))
+
+
+class RoomSearchResultTest(unittest.TestCase):
+    def test_results_and_facets_match_python_filtering(self):
+        conn = make_db(rooms=200)
+        all_rooms = conn.execute("SELECT room_type, status, capacity, price FROM rooms").fetchall()
+
+        for filters in filter_combinations():
+            rooms_sql, params, facet_sql, facet_params = build_room_search(filters)
+            rows = conn.execute(rooms_sql, params).fetchall()
+
+            def matches(room, skip=()):
+                room_type, status, capacity, price = room
+                return (("room_type" in skip or "room_type" not in filters or room_type == filters["room_type"])
+                        and ("status" in skip or "status" not in filters or status == filters["status"])
+                        and capacity >= filters.get("capacity", 0)
+                        and filters.get("min_price", 0) <= price <= filters.get("max_price", float("inf")))
+
+            self.assertEqual(len(rows), sum(1 for room in all_rooms if matches(room)), filters)
+
+            type_counts, status_counts = facet_counts(conn.execute(facet_sql, facet_params), filters)
+            for room_type, count in type_counts:
+                self.assertEqual(count, sum(1 for room in all_rooms
+                                            if room[0] == room_type and matches(room, skip=("room_type",))))
+            for status, count in status_counts:
+                self.assertEqual(count, sum(1 for room in all_rooms
+                                            if room[1] == status and matches(room, skip=("status",))))
+
+    def test_active_filters_stay_in_facets_without_matches(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute(ROOMS_TABLE)
+        create_room_indexes(conn.cursor())
+        conn.execute("INSERT INTO rooms (room_number, room_type, price, status, capacity) "
+                     "VALUES ('101', 'Single', 50, 'Available', 1)")
+        conn.execute("INSERT INTO rooms (room_number, room_type, price, status, capacity) "
+                     "VALUES ('102', 'Double', 90, 'Occupied', 2)")
+
+        filters = {"room_type": "Single", "status": "Occupied", "sort": "id"}
+        rooms_sql, params, facet_sql, facet_params = build_room_search(filters)
+        self.assertEqual(conn.execute(rooms_sql, params).fetchall(), [])
+
+        type_counts, status_counts = facet_counts(conn.execute(facet_sql, facet_params), filters)
+        self.assertEqual(type_counts, [("Double", 1), ("Single", 0)])
+        self.assertEqual(status_counts, [("Available", 1), ("Occupied", 0)])
+
+        # A filter value no room has at all is kept too
+        filters = {"room_type": "Penthouse", "status": "Cleaning", "capacity": 9, "sort": "id"}
+        rooms_sql, params, facet_sql, facet_params = build_room_search(filters)
+        type_counts, status_counts = facet_counts(conn.execute(facet_sql, facet_params), filters)
+        self.assertEqual(type_counts, [("Penthouse", 0)])
+        self.assertEqual(status_counts, [("Cleaning", 0)])
+
+
+if __name__ == "__main__":
+    unittest.main()